@@ -1197,6 +1197,8 @@ class DietRxApp:
                 results = fda_fetcher.fetch_and_store_all(limit=50)
                 
                 if results['stored'] > 0:
+                    # New interaction data invalidates previously cached analyses
+                    components['interaction_engine'].invalidate_interaction_data()
                     st.success(f"Added {results['stored']} new FDA interactions!")
                 else:
                     st.info("No new interactions found (may already exist)")
@@ -3,10 +3,11 @@ import plotly.graph_objects as go
 import plotly.express as px
 import pandas as pd
 import numpy as np
-from typing import Dict, List
-import logging
+from typing import IO, Dict, Optional
 from datetime import datetime
-from utils.analytics_engine import AnalyticsEngine
+
+# Risk level labels indexed by how many score thresholds (1.5, 2.5) are exceeded
+_RISK_LEVELS = np.array(['Low', 'Medium', 'High'], dtype=object)
 
 class AnalyticsDashboard:
     def __init__(self):
@@ -137,11 +138,17 @@ class AnalyticsDashboard:
         # Severity distribution pie chart
         severity_data = analytics_data.get('severity_distribution', {})
         if severity_data and 'severity_counts' in severity_data:
+            severity_counts = severity_data['severity_counts']
+            
+            # A single-slice pie says nothing, so don't build the figure for it
+            if len(severity_counts) < 2:
+                st.info("Interaction severity distribution unavailable (insufficient variety).")
+                return
             
             fig_severity = go.Figure(data=[go.Pie(
-                labels=list(severity_data['severity_counts'].keys()),
-                values=list(severity_data['severity_counts'].values()),
-                marker_colors=[self.color_scheme.get(k, '#gray') for k in severity_data['severity_counts'].keys()],
+                labels=list(severity_counts.keys()),
+                values=list(severity_counts.values()),
+                marker_colors=[self.color_scheme.get(k, '#gray') for k in severity_counts.keys()],
                 textinfo='label+percent+value',
                 textfont_size=12,
                 marker=dict(line=dict(color='#FFFFFF', width=2))
@@ -345,9 +352,9 @@ class AnalyticsDashboard:
             st.subheader("Highest Risk Drug Classes")
             
             risk_df = pd.DataFrame(highest_risk, columns=['Drug Class', 'Risk Score'])
-            risk_df['Risk Level'] = risk_df['Risk Score'].apply(
-                lambda x: 'High' if x > 2.5 else 'Medium' if x > 1.5 else 'Low'
-            )
+            # Each threshold passed bumps the index into Low/Medium/High
+            scores = risk_df['Risk Score'].to_numpy()
+            risk_df['Risk Level'] = _RISK_LEVELS[(scores > 1.5).astype(np.int8) + (scores > 2.5)]
             
             st.dataframe(risk_df, use_container_width=True)
     
@@ -609,20 +616,21 @@ class AnalyticsDashboard:
         st.dataframe(perf_df, use_container_width=True, hide_index=True)
 
 
-    def generate_analytics_pdf(self, analytics_data: Dict) -> bytes:
-        """Generate PDF report for analytics dashboard"""
+    def generate_analytics_pdf(self, analytics_data: Dict, out: Optional[IO[bytes]] = None) -> Optional[bytes]:
+        """Generate PDF report for analytics dashboard (written to ``out`` if given, else returned as bytes)"""
         
         from utils.pdf_generator import PDFReportGenerator
         import io
         from reportlab.lib.pagesizes import A4
-        from reportlab.platypus import SimpleDocTemplate, Paragraph, Spacer, PageBreak
-        from reportlab.lib.styles import getSampleStyleSheet
+        from reportlab.platypus import SimpleDocTemplate, Paragraph, Spacer
         
         # Create a simplified analytics report
-        buffer = io.BytesIO()
-        doc = SimpleDocTemplate(buffer, pagesize=A4, rightMargin=72, leftMargin=72, topMargin=72, bottomMargin=72)
+        buffer = io.BytesIO() if out is None else out
+        doc = SimpleDocTemplate(buffer, pagesize=A4, rightMargin=72, leftMargin=72, topMargin=72, bottomMargin=72,
+                                pageCompression=1)
         
-        styles = getSampleStyleSheet()
+        # Share the report generator's stylesheet instead of building a new one per export
+        styles = PDFReportGenerator().styles
         story = []
         
         # Title
@@ -668,7 +676,9 @@ class AnalyticsDashboard:
         ))
         
         doc.build(story)
-        buffer.seek(0)
+        
+        if out is not None:
+            return None
         return buffer.getvalue()
 
     def add_analytics_export_options(self, analytics_data: Dict):
@@ -1,13 +1,17 @@
 import streamlit as st
-import plotly.graph_objects as go
 import plotly.express as px
 from typing import List, Dict, Optional
 import json
+from collections import Counter, defaultdict
 from datetime import datetime
 from utils.interaction_engine import AnalysisResults, InteractionResult, Severity
-import base64
-from utils.pdf_generator import PDFReportGenerator
-import base64
+import re
+
+# Order interaction groups are shown in, most severe first
+_SEVERITY_ORDER = (Severity.AVOID, Severity.CAUTION, Severity.SAFE)
+
+# Leading icon of a recommendation: critical, warning or informational
+_REC_CATEGORY_RE = re.compile(r"(🚨)|(⚠️)|(📞|✅)")
 
 class ResultsDisplay:
     def __init__(self):
@@ -87,9 +91,14 @@ class ResultsDisplay:
         
         # Calculate metrics
         total_interactions = len(results.interactions)
-        avoid_count = sum(1 for i in results.interactions if i.severity == Severity.AVOID)
-        caution_count = sum(1 for i in results.interactions if i.severity == Severity.CAUTION)
-        safe_count = sum(1 for i in results.interactions if i.severity == Severity.SAFE)
+        if results.avoid_count is not None:
+            # Counted once by the engine
+            avoid_count, caution_count, safe_count = results.avoid_count, results.caution_count, results.safe_count
+        else:
+            severity_counts = Counter(i.severity for i in results.interactions)
+            avoid_count = severity_counts[Severity.AVOID]
+            caution_count = severity_counts[Severity.CAUTION]
+            safe_count = severity_counts[Severity.SAFE]
         
         # Create metrics columns
         col1, col2, col3, col4, col5 = st.columns(5)
@@ -205,10 +214,7 @@ class ResultsDisplay:
         st.plotly_chart(fig, use_container_width=True)
         
         # Summary pie chart
-        severity_counts = {}
-        for interaction in interactions:
-            severity = interaction.severity.value.title()
-            severity_counts[severity] = severity_counts.get(severity, 0) + 1
+        severity_counts = Counter(interaction.severity.value.title() for interaction in interactions)
         
         if len(severity_counts) > 1:
             fig_pie = px.pie(
@@ -232,21 +238,16 @@ class ResultsDisplay:
         
         st.subheader("Detailed Interaction Analysis")
         
-        # Group interactions by severity
-        grouped_interactions = {
-            Severity.AVOID: [],
-            Severity.CAUTION: [],
-            Severity.SAFE: []
-        }
-        
+        # Group interactions by severity (only severities that occur get a list)
+        grouped_interactions = defaultdict(list)
         for interaction in interactions:
             grouped_interactions[interaction.severity].append(interaction)
         
         # Display each group
-        for severity in [Severity.AVOID, Severity.CAUTION, Severity.SAFE]:
-            severity_interactions = grouped_interactions[severity]
-            if not severity_interactions:
+        for severity in _SEVERITY_ORDER:
+            if severity not in grouped_interactions:
                 continue
+            severity_interactions = grouped_interactions[severity]
             
             icon = self.severity_icons[severity]
             color = self.severity_colors[severity]
@@ -297,21 +298,13 @@ class ResultsDisplay:
         
         st.subheader("Personalized Recommendations")
         
-        # Categorize recommendations
-        critical_recs = []
-        warning_recs = []
-        info_recs = []
-        general_recs = []
-        
+        # Categorize recommendations by their leading icon in one match each
+        # (group 1/2/3 -> critical/warning/info, no match -> general)
+        categories = ([], [], [], [])
         for rec in recommendations:
-            if rec.startswith("🚨"):
-                critical_recs.append(rec)
-            elif rec.startswith("⚠️"):
-                warning_recs.append(rec)
-            elif rec.startswith("📞") or rec.startswith("✅"):
-                info_recs.append(rec)
-            else:
-                general_recs.append(rec)
+            match = _REC_CATEGORY_RE.match(rec)
+            categories[match.lastindex if match else 0].append(rec)
+        general_recs, critical_recs, warning_recs, info_recs = categories
         
         # Display by priority
         if critical_recs:
@@ -340,6 +333,9 @@ class ResultsDisplay:
         
         col1, col2, col3, col4 = st.columns(4)
         
+        # One timestamp for every download offered on this render
+        timestamp = datetime.now().strftime('%Y%m%d_%H%M%S')
+        
         with col1:
             # Simpler test - just show the download button directly
             try:
@@ -350,7 +346,7 @@ class ResultsDisplay:
                 st.download_button(
                     label="Download PDF Report",
                     data=pdf_bytes,
-                    file_name=f"interaction_report_{datetime.now().strftime('%Y%m%d_%H%M%S')}.pdf",
+                    file_name=f"interaction_report_{timestamp}.pdf",
                     mime="application/pdf",
                     type="primary",
                     key="download_pdf_report_unique"  # ADD UNIQUE KEY
@@ -364,7 +360,7 @@ class ResultsDisplay:
                 st.download_button(
                     label="Download Text Report",
                     data=report_text,
-                    file_name=f"interaction_report_{datetime.now().strftime('%Y%m%d_%H%M%S')}.txt",
+                    file_name=f"interaction_report_{timestamp}.txt",
                     mime="text/plain",
                     key="download_text_report_unique"  # ADD UNIQUE KEY
                 )
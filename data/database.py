@@ -367,6 +367,32 @@ class DatabaseManager:
         finally:
             conn.close()
 
+    def insert_known_interactions_bulk(self, rows: List[Tuple]) -> int:
+        """Insert many known interactions in a single transaction
+
+        Each row follows the insert_known_interaction argument order.
+        """
+        conn = self.get_connection()
+        cursor = conn.cursor()
+
+        try:
+            cursor.executemany("""
+                INSERT OR REPLACE INTO known_interactions
+                (medication_name, food_name, severity, interaction_type, mechanism,
+                clinical_effect, timing_recommendation, evidence_level, source)
+                VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)
+            """, rows)
+
+            conn.commit()
+            return cursor.rowcount
+
+        except sqlite3.Error as e:
+            logging.error(f"Error bulk inserting interactions: {e}")
+            conn.rollback()
+            raise
+        finally:
+            conn.close()
+
     def get_interactions_for_medication(self, medication_name: str) -> List[Dict]:
         """Get all known interactions for a medication"""
         conn = self.get_connection()
@@ -409,40 +435,21 @@ class DatabaseManager:
         finally:
             conn.close()
 
-    def find_interactions(self, medications: List[str], foods: List[str]) -> List[Dict]:
-        """Find all interactions between lists of medications and foods - case insensitive"""
+    def get_all_interactions(self) -> List[Dict]:
+        """Get every known interaction (used to build in-memory lookup indexes).
+        
+        Errors are logged and re-raised: an empty list would look like "no interactions".
+        """
         conn = self.get_connection()
         cursor = conn.cursor()
-        
+
         try:
-            # Create placeholders for the IN clauses
-            med_placeholders = ','.join(['?'] * len(medications))
-            food_placeholders = ','.join(['?'] * len(foods))
-            
-            # Use LOWER() for case-insensitive matching
-            query = f"""
-                SELECT * FROM known_interactions 
-                WHERE LOWER(medication_name) IN ({','.join(['LOWER(?)'] * len(medications))})
-                AND LOWER(food_name) IN ({','.join(['LOWER(?)'] * len(foods))})
-                ORDER BY 
-                    CASE severity 
-                        WHEN 'avoid' THEN 1 
-                        WHEN 'caution' THEN 2 
-                        WHEN 'safe' THEN 3 
-                    END,
-                    medication_name, food_name
-            """
-            
-            # Convert all inputs to lowercase for matching
-            all_params = [med.lower() for med in medications] + [food.lower() for food in foods]
-            
-            cursor.execute(query, all_params)
-            rows = cursor.fetchall()
-            return [dict(row) for row in rows]
-            
+            cursor.execute("SELECT * FROM known_interactions")
+            return [dict(row) for row in cursor.fetchall()]
+
         except sqlite3.Error as e:
-            logging.error(f"Error finding interactions: {e}")
-            return []
+            logging.error(f"Error getting all interactions: {e}")
+            raise
         finally:
             conn.close()
 
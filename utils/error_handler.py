@@ -4,6 +4,8 @@ import traceback
 from typing import Optional, Callable, Any
 from functools import wraps
 import time
+import re
+from itertools import islice
 from datetime import datetime
 
 class ErrorHandler:
@@ -50,6 +52,17 @@ class ErrorHandler:
             st.warning(f"⚠️ {error_message}")
             return fallback_value
     
+    @staticmethod
+    def safe_call(func: Callable, *args, fallback: Any = None,
+                  error_message: str = "Operation failed", **kwargs) -> Any:
+        """Like safe_execute, but calls func(*args, **kwargs) directly (no wrapping lambda needed)"""
+        try:
+            return func(*args, **kwargs)
+        except Exception as e:
+            ErrorHandler._log_error(getattr(func, '__name__', 'anonymous'), e)
+            st.warning(f"⚠️ {error_message}")
+            return fallback
+    
     @staticmethod
     def validate_user_input(medications: list, foods: list) -> tuple[bool, str]:
         """Validate user input for analysis"""
@@ -96,14 +109,11 @@ class GracefulDegradation:
     @staticmethod
     def fallback_fuzzy_matching(query: str, candidates: list) -> list:
         """Simple fallback when fuzzy matching fails"""
-        query_lower = query.lower()
-        matches = []
-        
-        for candidate in candidates:
-            if query_lower in candidate.lower():
-                matches.append(candidate)
+        # Case-insensitive regex search avoids lowercasing every candidate,
+        # and islice stops scanning once we have enough matches
+        pattern = re.compile(re.escape(query), re.IGNORECASE)
         
-        return matches[:10]  # Return top 10
+        return list(islice(filter(pattern.search, candidates), 10))  # Return top 10
     
     @staticmethod
     def fallback_interaction_analysis(medications: list, foods: list) -> dict:
@@ -1,8 +1,15 @@
 from rapidfuzz import fuzz, process
+from rapidfuzz.distance import Hamming
 from typing import List, Dict, Tuple, Optional
+import heapq
 import logging
 import re
 
+_WHITESPACE_RE = re.compile(r'\s')
+
+# How many distinct candidate lists to keep precomputed data for
+_MAX_CACHED_LISTS = 8
+
 class FuzzyMatcher:
     def __init__(self, match_threshold: int = 80):
         self.match_threshold = match_threshold
@@ -22,6 +29,20 @@ class FuzzyMatcher:
             'an': 'en',
         }
         
+        # One overlapping scan finds every typo fragment present in a string,
+        # so the per-pattern replaces below only run for patterns that hit
+        typo_fragments = sorted(set(self.common_typos) | set(self.common_typos.values()),
+                                key=len, reverse=True)
+        self._typo_fragment_re = re.compile('(?=(' + '|'.join(map(re.escape, typo_fragments)) + '))')
+        self._ending_fragments = tuple(set(self.common_endings) | set(self.common_endings.values()))
+        
+        # Sorted-token and lowercased forms of candidate lists, keyed by the names themselves
+        self._sorted_tokens_cache = {}
+        self._lower_candidates_cache = {}
+        
+        # Exact (raw and cleaned) name -> candidate lookups, keyed by the names themselves
+        self._exact_index_cache = {}
+        
     def clean_string(self, text: str) -> str:
         """Clean and normalize string for better matching"""
         if not text:
@@ -49,13 +70,18 @@ class FuzzyMatcher:
         variations = []
         
         # Apply common typo patterns
-        for wrong, right in self.common_typos.items():
-            if wrong in text:
-                variations.append(text.replace(wrong, right))
-            if right in text:
-                variations.append(text.replace(right, wrong))
+        present = set(self._typo_fragment_re.findall(text))
+        if present:
+            for wrong, right in self.common_typos.items():
+                if wrong in present:
+                    variations.append(text.replace(wrong, right))
+                if right in present:
+                    variations.append(text.replace(right, wrong))
         
         # Apply common ending variations
+        if not text.endswith(self._ending_fragments):
+            return variations
+        
         for wrong, right in self.common_endings.items():
             if text.endswith(wrong):
                 variations.append(text[:-len(wrong)] + right)
@@ -102,46 +128,123 @@ class FuzzyMatcher:
         
         return list(set(variations))  # Remove duplicates
     
-    def calculate_enhanced_score(self, query: str, candidate: str) -> float:
-        """Calculate enhanced similarity score with typo-awareness"""
+    @staticmethod
+    def _sort_tokens(text: str) -> str:
+        """Token-sorted form of a string, as used by fuzz.token_sort_ratio"""
+        return ' '.join(sorted(text.split()))
+    
+    def _get_sorted_candidates(self, candidates: List[str]) -> List[str]:
+        """Sorted-token forms of candidates, computed once per list"""
+        return self._get_per_list(self._sorted_tokens_cache, candidates,
+                                  lambda cs: [self._sort_tokens(c) for c in cs])
+    
+    def _get_lower_candidates(self, candidates: List[str]) -> List[str]:
+        """Lowercased candidates, computed once per list"""
+        return self._get_per_list(self._lower_candidates_cache, candidates,
+                                  lambda cs: [c.lower() for c in cs])
+    
+    def _get_exact_index(self, candidates: List[str]) -> Dict[str, Optional[str]]:
+        """Map raw and cleaned candidate names to the candidate, computed once per list
+
+        A cleaned name shared by several candidates maps to None (ambiguous), so
+        those queries go through normal scoring and no candidate is dropped.
+        """
+        def build(cs):
+            index = {}
+            for c in cs:
+                cleaned = self.clean_string(c)
+                if cleaned:
+                    index[cleaned] = None if cleaned in index and index[cleaned] != c else c
+            index.update((c, c) for c in cs if c)  # Raw names win over cleaned ones
+            return index
         
-        # Start with basic scores
-        ratio_score = fuzz.ratio(query, candidate)
-        partial_score = fuzz.partial_ratio(query, candidate)
-        token_sort_score = fuzz.token_sort_ratio(query, candidate)
-        token_set_score = fuzz.token_set_ratio(query, candidate)
+        return self._get_per_list(self._exact_index_cache, candidates, build)
+    
+    def _get_per_list(self, cache: Dict, candidates: List[str], build):
+        """Build derived data for a candidate list once and reuse it for the same names
+
+        Entries are keyed on the names, not the list object, so a rebuilt list with
+        the same contents hits and a list changed in place misses.
+        """
+        key = tuple(candidates)
+        derived = cache.get(key)
+        if derived is None:
+            derived = build(candidates)
+            self._remember(cache, key, derived)
+        return derived
+    
+    @staticmethod
+    def _remember(cache: Dict, key, value):
+        """Store a per-list cache entry, evicting the oldest when full"""
+        cache.pop(key, None)
+        if len(cache) >= _MAX_CACHED_LISTS:
+            cache.pop(next(iter(cache)))
+        cache[key] = value
+    
+    def calculate_enhanced_score(self, query: str, candidate: str, score_cutoff: float = 0,
+                                 query_sorted: Optional[str] = None,
+                                 candidate_sorted: Optional[str] = None) -> float:
+        """Calculate enhanced similarity score with typo-awareness
+
+        Candidates that provably cannot reach score_cutoff return 0.0 early.
+        query_sorted/candidate_sorted are optional precomputed token-sorted
+        forms (see _sort_tokens) so repeated scoring skips re-tokenizing.
+        """
         
-        # Calculate weighted average
-        base_score = (ratio_score * 0.4 + partial_score * 0.2 + 
-                     token_sort_score * 0.2 + token_set_score * 0.2)
+        # Cheap length pre-filter: a very different length can't score well
+        # (partial/prefix matches are still picked up by WRatio in find_best_matches)
+        query_len, candidate_len = len(query), len(candidate)
+        if score_cutoff and abs(query_len - candidate_len) > max(query_len, candidate_len) * 0.5:
+            return 0.0
         
         # Boost score for common typo patterns
         query_clean = self.clean_string(query.lower())
         candidate_clean = self.clean_string(candidate.lower())
+        boost = 0
         
         # Check for common medication typo: "in" ending vs "en" ending
         if (query_clean.endswith('in') and candidate_clean.endswith('en') and 
             query_clean[:-2] == candidate_clean[:-2]):
-            base_score = min(100, base_score + 15)  # Boost for ibuprofin -> ibuprofen
+            boost += 15  # Boost for ibuprofin -> ibuprofen
         
         # Check for ph/f substitution
         if ('ph' in candidate_clean and 'f' in query_clean and 
             candidate_clean.replace('ph', 'f') == query_clean):
-            base_score = min(100, base_score + 10)
+            boost += 10
         
         # Check for single character differences
-        if abs(len(query_clean) - len(candidate_clean)) <= 1:
-            # Count character differences
-            max_len = max(len(query_clean), len(candidate_clean))
-            if max_len > 0:
-                diff_count = sum(1 for i in range(max_len) 
-                               if i >= len(query_clean) or i >= len(candidate_clean) or 
-                               query_clean[i] != candidate_clean[i])
-                
-                if diff_count <= 2:  # Very similar
-                    base_score = min(100, base_score + 10)
+        if abs(len(query_clean) - len(candidate_clean)) <= 1 and (query_clean or candidate_clean):
+            # Count positional character differences (a missing trailing char counts as one)
+            diff_count = Hamming.distance(query_clean, candidate_clean, pad=True)
+            
+            if diff_count <= 2:  # Very similar
+                boost += 10
+        
+        # Start with basic scores
+        ratio_score = fuzz.ratio(query, candidate)
+        
+        # The other three scorers add at most 60 points, so bail out if even
+        # perfect scores there couldn't lift this candidate over the cutoff
+        if score_cutoff and ratio_score * 0.4 + 60 + boost < score_cutoff:
+            return 0.0
+        
+        partial_score = fuzz.partial_ratio(query, candidate)
         
-        return base_score
+        # Token-based scorers degenerate to plain ratio for single-token strings
+        if _WHITESPACE_RE.search(query) or _WHITESPACE_RE.search(candidate):
+            if query_sorted is None or candidate_sorted is None:
+                token_sort_score = fuzz.token_sort_ratio(query, candidate)
+            else:
+                token_sort_score = fuzz.ratio(query_sorted, candidate_sorted)
+            token_set_score = fuzz.token_set_ratio(query, candidate)
+        else:
+            token_sort_score = token_set_score = ratio_score
+        
+        # Calculate weighted average
+        base_score = (ratio_score * 0.4 + partial_score * 0.2 + 
+                     token_sort_score * 0.2 + token_set_score * 0.2)
+        
+        return min(100, base_score + boost) if boost else base_score
     
     def find_best_matches(self, query: str, candidates: List[str], 
                          limit: int = 5, score_cutoff: int = None) -> List[Tuple[str, float]]:
@@ -153,6 +256,14 @@ class FuzzyMatcher:
             score_cutoff = max(50, self.match_threshold - 30)  # More lenient threshold
         
         try:
+            # A single exact hit (raw or cleaned) can't be beaten, so a one-result
+            # lookup skips the fuzzy passes; longer lists still want the near matches
+            if limit == 1:
+                exact_index = self._get_exact_index(candidates)
+                exact = exact_index.get(query) or exact_index.get(self.clean_string(query))
+                if exact:
+                    return [(exact, 100.0)]
+            
             # Generate query variations
             query_variations = self.generate_variations(query)
             
@@ -179,8 +290,13 @@ class FuzzyMatcher:
                         all_matches.append((match_text, float(match_score)))
             
             # Approach 2: Enhanced scoring for all candidates
-            for candidate in candidates:
-                enhanced_score = self.calculate_enhanced_score(query, candidate)
+            query_sorted = self._sort_tokens(query)
+            sorted_candidates = self._get_sorted_candidates(candidates)
+            for candidate, candidate_sorted in zip(candidates, sorted_candidates):
+                enhanced_score = self.calculate_enhanced_score(
+                    query, candidate, score_cutoff,
+                    query_sorted=query_sorted, candidate_sorted=candidate_sorted
+                )
                 if enhanced_score >= score_cutoff:
                     all_matches.append((candidate, enhanced_score))
             
@@ -190,11 +306,8 @@ class FuzzyMatcher:
                 if match not in unique_matches or score > unique_matches[match]:
                     unique_matches[match] = score
             
-            # Convert back to list and sort
-            final_matches = [(match, score) for match, score in unique_matches.items()]
-            final_matches.sort(key=lambda x: x[1], reverse=True)
-            
-            return final_matches[:limit]
+            # Keep only the top matches (no need to sort the whole list)
+            return heapq.nlargest(limit, unique_matches.items(), key=lambda x: x[1])
             
         except Exception as e:
             logging.error(f"Error in fuzzy matching: {e}")
@@ -205,15 +318,13 @@ class FuzzyMatcher:
         matches = []
         query_lower = query.lower()
         
-        for candidate in candidates:
-            candidate_lower = candidate.lower()
-            
+        for candidate, candidate_lower in zip(candidates, self._get_lower_candidates(candidates)):
             # Exact match
             if query_lower == candidate_lower:
                 matches.append((candidate, 100.0))
             # Very close match (one character difference)
             elif len(query_lower) == len(candidate_lower):
-                diff_count = sum(1 for a, b in zip(query_lower, candidate_lower) if a != b)
+                diff_count = Hamming.distance(query_lower, candidate_lower)
                 if diff_count == 1:
                     matches.append((candidate, 95.0))
                 elif diff_count == 2:
@@ -228,9 +339,8 @@ class FuzzyMatcher:
             elif candidate_lower in query_lower:
                 matches.append((candidate, 70.0))
         
-        # Sort by score and return top matches
-        matches.sort(key=lambda x: x[1], reverse=True)
-        return matches[:limit]
+        # Return top matches by score
+        return heapq.nlargest(limit, matches, key=lambda x: x[1])
     
     def find_matches_in_data(self, query: str, data_list: List[Dict], 
                            name_field: str = 'name', include_aliases: bool = True,
@@ -241,12 +351,12 @@ class FuzzyMatcher:
         
         try:
             # Collect all searchable names
-            search_candidates = {}  # name -> original_data_item
+            search_candidates = {}  # name -> index into data_list
             
-            for item in data_list:
+            for idx, item in enumerate(data_list):
                 name = item.get(name_field, '')
                 if name:
-                    search_candidates[name] = item
+                    search_candidates[name] = idx
                     
                     # Add aliases if available and requested
                     if include_aliases:
@@ -254,7 +364,7 @@ class FuzzyMatcher:
                         if aliases:
                             for alias in aliases:
                                 if alias and alias not in search_candidates:
-                                    search_candidates[alias] = item
+                                    search_candidates[alias] = idx
             
             # Find best matches
             candidate_names = list(search_candidates.keys())
@@ -265,16 +375,12 @@ class FuzzyMatcher:
             seen_items = set()
             
             for match_name, score in matches:
-                item = search_candidates[match_name]
-                item_id = id(item)  # Use object id to avoid duplicates
+                idx = search_candidates[match_name]  # Row index dedups name/alias hits
                 
-                if item_id not in seen_items:
-                    # Add match score to item
-                    result_item = item.copy()
-                    result_item['match_score'] = score
-                    result_item['matched_name'] = match_name
-                    result_items.append(result_item)
-                    seen_items.add(item_id)
+                if idx not in seen_items:
+                    # Overlay match info in one allocation (source item stays untouched)
+                    result_items.append({**data_list[idx], 'match_score': score, 'matched_name': match_name})
+                    seen_items.add(idx)
             
             return result_items
             
@@ -1,16 +1,29 @@
 import logging
-from typing import List, Dict, Optional, Tuple
-from dataclasses import dataclass
+import sys
+from typing import List, Dict, FrozenSet, Optional, Tuple, TYPE_CHECKING
+from datetime import datetime
+from dataclasses import dataclass, replace
+from collections import OrderedDict
+from itertools import chain
 from enum import Enum
 import json
+import streamlit as st
+import hashlib
 from data.database import DatabaseManager
 from utils.fuzzy_matcher import FuzzyMatcher
 from utils.error_handler import ErrorHandler, GracefulDegradation
 
 class Severity(Enum):
-    SAFE = "safe"
-    CAUTION = "caution"
-    AVOID = "avoid"
+    SAFE = ("safe", 2)
+    CAUTION = ("caution", 1)
+    AVOID = ("avoid", 0)
+    
+    def __new__(cls, value: str, rank: int):
+        # Value stays the plain string ("safe", ...); rank orders by severity (lower = more severe)
+        member = object.__new__(cls)
+        member._value_ = value
+        member.rank = rank
+        return member
 
 class InteractionType(Enum):
     ABSORPTION = "absorption"
@@ -19,7 +32,7 @@ class InteractionType(Enum):
     TOXICITY = "toxicity"
     TIMING = "timing"
 
-@dataclass
+@dataclass(slots=True)
 class InteractionResult:
     """Represents a single interaction finding"""
     medication: str
@@ -32,9 +45,19 @@ class InteractionResult:
     confidence: float
     evidence_level: str
     source: str = "Database"
+    
+    def to_ai_dict(self) -> Dict:
+        """Payload format expected by AIAnalyzer and GracefulDegradation"""
+        return {
+            'medication_name': self.medication,
+            'food_name': self.food,
+            'severity': self.severity.value,
+            'mechanism': self.mechanism,
+            'clinical_effect': self.clinical_effect,
+            'timing_recommendation': self.timing_recommendation
+        }
 
-@dataclass
-@dataclass
+@dataclass(slots=True)
 class AnalysisResults:
     """Complete analysis results"""
     interactions: List[InteractionResult]
@@ -46,14 +69,80 @@ class AnalysisResults:
     confidence_score: float
     analysis_timestamp: str
     ai_analysis: Optional['AIAnalysisResult'] = None  # NEW: Add AI analysis
+    # Per-severity counts filled in by the engine (None when not computed)
+    avoid_count: Optional[int] = None
+    caution_count: Optional[int] = None
+    safe_count: Optional[int] = None
+
+if TYPE_CHECKING:
+    from utils.ai_analyzer import AIAnalyzer, AIAnalysisResult
+
+# Confidence contributed by each evidence level (anything else counts as 0.6)
+_EVIDENCE_WEIGHT = {"established": 0.95, "probable": 0.8}
+
+# Summary wording per severity, in the order they are reported
+_SUMMARY_LABELS = (
+    (Severity.AVOID, "serious interaction(s) to avoid"),
+    (Severity.CAUTION, "interaction(s) requiring caution"),
+    (Severity.SAFE, "low-risk interaction(s)"),
+)
 
-from utils.ai_analyzer import AIAnalyzer, AIAnalysisResult
+# Number of distinct (medications, foods) selections to keep analysis results for
+ANALYSIS_CACHE_SIZE = 256
+
+# Number of distinct interaction sets to keep AI analysis/advice for
+AI_RESULT_CACHE_SIZE = 512
 
 class InteractionEngine:
     def __init__(self, db_manager: DatabaseManager, fuzzy_matcher: FuzzyMatcher):
         self.db = db_manager
         self.fuzzy_matcher = fuzzy_matcher
-        self.ai_analyzer = AIAnalyzer()  # NEW: Add AI analyzer
+        self._ai_analyzer = None  # Created on first use (pulls in the optional AI backends)
+        
+        # Completed analyses keyed by selection signature (LRU)
+        self._analysis_cache = OrderedDict()
+        
+        # food_lower -> {medication_lower: known interaction rows}, built on first lookup
+        self._interaction_index = None
+        
+        # (ai_result, advice) keyed by selection and interaction fingerprint (LRU)
+        self._ai_result_cache = OrderedDict()
+    
+    @property
+    def ai_analyzer(self) -> 'AIAnalyzer':
+        """AI analyzer, imported and constructed on first access"""
+        if self._ai_analyzer is None:
+            from utils.ai_analyzer import AIAnalyzer
+            self._ai_analyzer = AIAnalyzer()
+        return self._ai_analyzer
+    
+    def clear_analysis_cache(self):
+        """Forget cached analyses (call after the interaction data changes)"""
+        self._analysis_cache.clear()
+        logging.info("Analysis cache cleared")
+    
+    def invalidate_interaction_data(self):
+        """Drop the interaction index and cached analyses after the database changes"""
+        self._interaction_index = None
+        self._ai_result_cache.clear()
+        self.clear_analysis_cache()
+    
+    def _get_interaction_index(self) -> Dict[str, Dict[str, List[Dict]]]:
+        """Load all known interactions once and index them by lowercased food, then medication"""
+        if self._interaction_index is None:
+            index = {}
+            for row in self.db.get_all_interactions():
+                # Intern names once here so every result and dedup key shares the same objects
+                row['medication_name'] = sys.intern(row['medication_name'])
+                row['food_name'] = sys.intern(row['food_name'])
+                by_medication = index.setdefault(sys.intern(row['food_name'].lower()), {})
+                by_medication.setdefault(sys.intern(row['medication_name'].lower()), []).append(row)
+            if not index:
+                # Nothing loaded yet; don't pin an empty index, try again next lookup
+                return index
+            self._interaction_index = index
+            logging.info(f"Built interaction index covering {len(index)} foods")
+        return self._interaction_index
 
     def analyze_interactions(self, medications: List[str], foods: List[str]) -> AnalysisResults:
         """Main method to analyze interactions between medications and foods with error handling"""
@@ -62,7 +151,6 @@ class InteractionEngine:
         is_valid, validation_msg = ErrorHandler.validate_user_input(medications, foods)
         if not is_valid:
             # Return minimal safe results for invalid input
-            from datetime import datetime
             return AnalysisResults(
                 interactions=[],
                 medications_analyzed=medications,
@@ -74,68 +162,86 @@ class InteractionEngine:
                 analysis_timestamp=datetime.now().isoformat()
             )
         
+        # Same selection (in any order) -> reuse the previous analysis
+        cache_key = (frozenset(medications), frozenset(foods), len(medications), len(foods))
+        cached = self._analysis_cache.get(cache_key)
+        if cached is not None:
+            self._analysis_cache.move_to_end(cache_key)
+            logging.info("Returning cached interaction analysis")
+            return replace(
+                cached,
+                interactions=list(cached.interactions),
+                medications_analyzed=medications,
+                foods_analyzed=foods,
+                recommendations=list(cached.recommendations),
+                analysis_timestamp=datetime.now().isoformat()
+            )
+        
         logging.info(f"Analyzing interactions for {len(medications)} medications and {len(foods)} foods")
         
+        # Normalize the selection once; lookups work on these interned, lowercased names
+        meds_norm = frozenset(sys.intern(med.strip().lower()) for med in medications)
+        foods_norm = frozenset(sys.intern(food.strip().lower()) for food in foods)
+        
         try:
-            # Find direct interactions from database
-            direct_interactions = ErrorHandler.safe_execute(
-                lambda: self._find_direct_interactions(medications, foods),
-                fallback_value=[],
+            # Find direct interactions from database (None means the lookup failed)
+            direct_interactions = ErrorHandler.safe_call(
+                self._find_direct_interactions, meds_norm, foods_norm,
+                fallback=None,
                 error_message="Database lookup encountered issues, continuing with available data"
             )
             
             # Find fuzzy matches for better coverage
-            fuzzy_interactions = ErrorHandler.safe_execute(
-                lambda: self._find_fuzzy_interactions(medications, foods),
-                fallback_value=[],
+            fuzzy_interactions = ErrorHandler.safe_call(
+                self._find_fuzzy_interactions, medications, foods,
+                fallback=None,
                 error_message="Fuzzy matching unavailable"
             )
             
+            # Results built on a failed lookup must not outlive the failure
+            cacheable = direct_interactions is not None and fuzzy_interactions is not None
+            
             # Combine and deduplicate
             all_interactions = self._combine_interactions(direct_interactions or [], fuzzy_interactions or [])
             
+            # Severity grouping reused by the steps below
+            by_severity = self._group_by_severity(all_interactions)
+            
             # Calculate overall risk
-            overall_risk = self._calculate_overall_risk(all_interactions)
+            overall_risk = self._calculate_overall_risk(all_interactions, by_severity)
             
             # Generate summary and recommendations
-            summary = self._generate_summary(all_interactions, medications, foods)
-            recommendations = self._generate_recommendations(all_interactions)
+            summary = self._generate_summary(all_interactions, medications, foods, by_severity)
+            recommendations = self._generate_recommendations(all_interactions, by_severity)
             
             # Calculate confidence score
             confidence = self._calculate_confidence(all_interactions, medications, foods)
             
-            # AI analysis with fallback
+            # AI analysis with fallback. Only results with an avoid or caution finding are
+            # sent to the analyzer; empty and all-safe results get the minimal analysis
             ai_analysis = None
             try:
-                interaction_dicts = []
-                for interaction in all_interactions:
-                    interaction_dicts.append({
-                        'medication_name': interaction.medication,
-                        'food_name': interaction.food,
-                        'severity': interaction.severity.value,
-                        'mechanism': interaction.mechanism,
-                        'clinical_effect': interaction.clinical_effect,
-                        'timing_recommendation': interaction.timing_recommendation
-                    })
-                
-                ai_result = self.ai_analyzer.analyze_interactions(medications, foods, interaction_dicts)
+                ai_result, ai_advice = None, ()
+                if by_severity[Severity.AVOID] or by_severity[Severity.CAUTION]:
+                    ai_result, ai_advice = self._run_ai_analysis(medications, foods, all_interactions)
                 
                 if ai_result:
                     summary = f"{ai_result.enhanced_summary}\n\n{summary}"
-                    ai_advice = self.ai_analyzer.get_personalized_advice(interaction_dicts)
                     recommendations.extend(ai_advice)
                     ai_analysis = ai_result
                 else:
                     # Fallback AI analysis
-                    fallback_ai = GracefulDegradation.minimal_ai_analysis(interaction_dicts)
+                    fallback_ai = GracefulDegradation.minimal_ai_analysis(
+                        [interaction.to_ai_dict() for interaction in all_interactions]
+                    )
                     summary = f"{fallback_ai['summary']}\n\n{summary}"
                     recommendations.extend(fallback_ai['warnings'])
                     
             except Exception as e:
                 logging.warning(f"AI analysis failed: {e}")
+                cacheable = False
                 st.info("Advanced AI analysis temporarily unavailable. Basic analysis provided.")
             
-            from datetime import datetime
             results = AnalysisResults(
                 interactions=all_interactions,
                 medications_analyzed=medications,
@@ -144,10 +250,24 @@ class InteractionEngine:
                 summary=summary,
                 recommendations=recommendations,
                 confidence_score=confidence,
-                analysis_timestamp=datetime.now().isoformat()
+                analysis_timestamp=datetime.now().isoformat(),
+                avoid_count=len(by_severity[Severity.AVOID]),
+                caution_count=len(by_severity[Severity.CAUTION]),
+                safe_count=len(by_severity[Severity.SAFE])
             )
             
             results.ai_analysis = ai_analysis
+            
+            # Cache a private copy so callers can't mutate the cached lists
+            if cacheable:
+                self._analysis_cache[cache_key] = replace(
+                    results,
+                    interactions=list(all_interactions),
+                    recommendations=list(recommendations)
+                )
+                if len(self._analysis_cache) > ANALYSIS_CACHE_SIZE:
+                    self._analysis_cache.popitem(last=False)
+            
             return results
             
         except Exception as e:
@@ -155,7 +275,6 @@ class InteractionEngine:
             # Return fallback analysis
             fallback_results = GracefulDegradation.fallback_interaction_analysis(medications, foods)
             
-            from datetime import datetime
             return AnalysisResults(
                 interactions=[],
                 medications_analyzed=medications,
@@ -167,15 +286,54 @@ class InteractionEngine:
                 analysis_timestamp=datetime.now().isoformat()
             )
     
-    def _find_direct_interactions(self, medications: List[str], foods: List[str]) -> List[InteractionResult]:
-        """Find interactions using exact database matches"""
-        interactions = []
-        
-        # Get interactions from database
-        db_interactions = self.db.find_interactions(medications, foods)
-        
-        for interaction in db_interactions:
-            result = InteractionResult(
+    def _run_ai_analysis(self, medications: List[str], foods: List[str],
+                         interactions: List[InteractionResult]) -> Tuple[Optional['AIAnalysisResult'], Tuple[str, ...]]:
+        """AI analysis plus personalized advice, reused for identical interaction sets"""
+        # The analyzer also sees the selection itself, so only the same selection with
+        # the same interaction set gets the same AI output and can skip the round-trip
+        fingerprint = (frozenset(medications), frozenset(foods), hashlib.blake2b(
+            json.dumps(
+                sorted((i.medication, i.food, i.severity.value) for i in interactions),
+                separators=(',', ':')
+            ).encode(),
+            digest_size=16
+        ).digest())
+        cached = self._ai_result_cache.get(fingerprint)
+        if cached is not None:
+            self._ai_result_cache.move_to_end(fingerprint)
+            return cached
+        
+        # Dict payload is only built when the analyzer actually has to run
+        interaction_dicts = [interaction.to_ai_dict() for interaction in interactions]
+        ai_result = self.ai_analyzer.analyze_interactions(medications, foods, interaction_dicts)
+        if not ai_result:
+            return None, ()
+        
+        entry = (ai_result, tuple(self.ai_analyzer.get_personalized_advice(interaction_dicts)))
+        self._ai_result_cache[fingerprint] = entry
+        if len(self._ai_result_cache) > AI_RESULT_CACHE_SIZE:
+            self._ai_result_cache.popitem(last=False)
+        return entry
+    
+    def _find_direct_interactions(self, meds_norm: FrozenSet[str], foods_norm: FrozenSet[str]) -> List[InteractionResult]:
+        """Find interactions using exact database matches (names already stripped and lowercased)"""
+        # Probe the in-memory index instead of querying the database per analysis
+        index = self._get_interaction_index()
+        db_interactions = []
+        for food_lower in foods_norm:
+            by_medication = index.get(food_lower)
+            if not by_medication:
+                continue
+            # Only medications known to interact with this food are probed
+            for med_lower in meds_norm.intersection(by_medication):
+                db_interactions.extend(by_medication[med_lower])
+        # Same ordering the database query used: severity first, then names
+        db_interactions.sort(key=lambda row: (
+            Severity(row['severity']).rank, row['medication_name'], row['food_name']
+        ))
+        
+        return [
+            InteractionResult(
                 medication=interaction['medication_name'],
                 food=interaction['food_name'],
                 severity=Severity(interaction['severity']),
@@ -187,9 +345,8 @@ class InteractionEngine:
                 evidence_level=interaction.get('evidence_level', 'established'),
                 source=interaction.get('source', 'Medical database')
             )
-            interactions.append(result)
-        
-        return interactions
+            for interaction in db_interactions
+        ]
     
     def _find_fuzzy_interactions(self, medications: List[str], foods: List[str]) -> List[InteractionResult]:
         """Find interactions using fuzzy matching for broader coverage"""
@@ -208,65 +365,64 @@ class InteractionEngine:
     def _combine_interactions(self, direct: List[InteractionResult], 
                             fuzzy: List[InteractionResult]) -> List[InteractionResult]:
         """Combine and deduplicate interaction results"""
-        all_interactions = direct + fuzzy
-        
-        # Remove duplicates based on medication-food pairs
-        seen = set()
-        unique_interactions = []
+        # Keep the most severe finding per medication-food pair, so a fuzzy
+        # "safe" can never shadow a database "avoid" (ties keep the first seen)
+        best = {}
         
-        for interaction in all_interactions:
+        for interaction in chain(direct, fuzzy):
             key = (interaction.medication, interaction.food)
-            if key not in seen:
-                seen.add(key)
-                unique_interactions.append(interaction)
+            current = best.get(key)
+            if current is None or interaction.severity.rank < current.severity.rank:
+                best[key] = interaction
         
         # Sort by severity (most severe first)
-        severity_order = {Severity.AVOID: 0, Severity.CAUTION: 1, Severity.SAFE: 2}
-        unique_interactions.sort(key=lambda x: severity_order[x.severity])
-        
-        return unique_interactions
+        return sorted(best.values(), key=lambda x: x.severity.rank)
+    
+    @staticmethod
+    def _empty_severity_groups() -> Dict[Severity, List[InteractionResult]]:
+        """Fresh severity -> interactions buckets"""
+        return {Severity.AVOID: [], Severity.CAUTION: [], Severity.SAFE: []}
+    
+    def _group_by_severity(self, interactions: List[InteractionResult]) -> Dict[Severity, List[InteractionResult]]:
+        """Group interactions by severity in one pass (order within groups preserved)"""
+        groups = self._empty_severity_groups()
+        for interaction in interactions:
+            groups[interaction.severity].append(interaction)
+        return groups
     
-    def _calculate_overall_risk(self, interactions: List[InteractionResult]) -> Severity:
+    def _calculate_overall_risk(self, interactions: List[InteractionResult],
+                                by_severity: Dict[Severity, List[InteractionResult]]) -> Severity:
         """Calculate overall risk level based on all interactions"""
         if not interactions:
             return Severity.SAFE
         
         # If any interaction is "avoid", overall risk is "avoid"
-        if any(i.severity == Severity.AVOID for i in interactions):
+        if by_severity[Severity.AVOID]:
             return Severity.AVOID
         
         # If any interaction is "caution", overall risk is "caution"
-        if any(i.severity == Severity.CAUTION for i in interactions):
+        if by_severity[Severity.CAUTION]:
             return Severity.CAUTION
         
         return Severity.SAFE
     
     def _generate_summary(self, interactions: List[InteractionResult], 
-                         medications: List[str], foods: List[str]) -> str:
+                         medications: List[str], foods: List[str],
+                         by_severity: Dict[Severity, List[InteractionResult]]) -> str:
         """Generate a human-readable summary"""
         if not interactions:
             return f"No significant interactions found between {len(medications)} medications and {len(foods)} foods."
         
-        avoid_count = sum(1 for i in interactions if i.severity == Severity.AVOID)
-        caution_count = sum(1 for i in interactions if i.severity == Severity.CAUTION)
-        safe_count = sum(1 for i in interactions if i.severity == Severity.SAFE)
-        
-        summary_parts = []
-        
-        if avoid_count > 0:
-            summary_parts.append(f"{avoid_count} serious interaction(s) to avoid")
-        
-        if caution_count > 0:
-            summary_parts.append(f"{caution_count} interaction(s) requiring caution")
-        
-        if safe_count > 0:
-            summary_parts.append(f"{safe_count} low-risk interaction(s)")
+        # Only the counts are needed here
+        counts = {severity: len(group) for severity, group in by_severity.items()}
         
-        summary = f"Found {len(interactions)} interaction(s): " + ", ".join(summary_parts) + "."
+        parts = (f"{counts[severity]} {label}" for severity, label in _SUMMARY_LABELS if counts[severity] > 0)
+        summary = f"Found {len(interactions)} interaction(s): {', '.join(parts)}."
         
         return summary
     
-    def _generate_recommendations(self, interactions: List[InteractionResult]) -> List[str]:
+    def _generate_recommendations(self, interactions: List[InteractionResult],
+                                  by_severity: Dict[Severity, List[InteractionResult]]) -> List[str]:
         """Generate actionable recommendations"""
         recommendations = []
         
@@ -275,18 +431,18 @@ class InteractionEngine:
             recommendations.append("Always consult your healthcare provider about medication and diet interactions.")
             return recommendations
         
-        # Group by severity
-        avoid_interactions = [i for i in interactions if i.severity == Severity.AVOID]
-        caution_interactions = [i for i in interactions if i.severity == Severity.CAUTION]
+        # Only the top 3 of each class are used
+        avoid_interactions = by_severity[Severity.AVOID][:3]
+        caution_interactions = by_severity[Severity.CAUTION][:3]
         
         if avoid_interactions:
             recommendations.append("**Serious Interactions - Action Required:**")
-            for interaction in avoid_interactions[:3]:  # Limit to top 3
+            for interaction in avoid_interactions:
                 recommendations.append(f"   • Avoid {interaction.food} while taking {interaction.medication}")
         
         if caution_interactions:
             recommendations.append("**Interactions Requiring Caution:**")
-            for interaction in caution_interactions[:3]:  # Limit to top 3
+            for interaction in caution_interactions:
                 if interaction.timing_recommendation:
                     recommendations.append(f"   • {interaction.timing_recommendation}")
                 else:
@@ -302,22 +458,19 @@ class InteractionEngine:
         if not interactions:
             return 0.8  # Moderate confidence when no interactions found
         
-        # Base confidence on evidence levels and number of interactions
+        # Base confidence on evidence levels; collect covered items in the same pass
         total_confidence = 0
+        covered = set()
         for interaction in interactions:
-            if interaction.evidence_level == "established":
-                total_confidence += 0.95
-            elif interaction.evidence_level == "probable":
-                total_confidence += 0.8
-            else:
-                total_confidence += 0.6
+            total_confidence += _EVIDENCE_WEIGHT.get(interaction.evidence_level, 0.6)
+            covered.add(interaction.medication)
+            covered.add(interaction.food)
         
-        average_confidence = total_confidence / len(interactions) if interactions else 0.8
+        average_confidence = total_confidence / len(interactions)
         
         # Adjust based on coverage (how many items we found interactions for)
         total_items = len(medications) + len(foods)
-        coverage = len(set(i.medication for i in interactions) | 
-                      set(i.food for i in interactions)) / total_items if total_items > 0 else 0
+        coverage = len(covered) / total_items if total_items > 0 else 0
         
         # Weighted confidence score
         final_confidence = (average_confidence * 0.7) + (coverage * 0.3)
@@ -1,189 +1,386 @@
 import io
 import logging
-from typing import Dict, List, Optional
+import re
+from concurrent.futures import ThreadPoolExecutor
+from itertools import chain
+from typing import IO, TYPE_CHECKING, Dict, List, Optional
+from xml.sax.saxutils import escape
 from datetime import datetime
 from reportlab.lib import colors
 from reportlab.lib.pagesizes import letter
 from reportlab.lib.styles import getSampleStyleSheet
 from reportlab.lib.units import inch
-from reportlab.platypus import SimpleDocTemplate, Paragraph, Spacer, Table, TableStyle, PageBreak
-from utils.interaction_engine import AnalysisResults, Severity
+from reportlab.platypus import BaseDocTemplate, Frame, PageTemplate, Paragraph, Spacer, Table, TableStyle, PageBreak
+
+if TYPE_CHECKING:
+    from utils.interaction_engine import AnalysisResults
+
+# The sample stylesheet is never modified, so build it once and share it
+_STYLES = getSampleStyleSheet()
+_TITLE = _STYLES['Title']
+_NORMAL = _STYLES['Normal']
+_H2 = _STYLES['Heading2']
+_H3 = _STYLES['Heading3']
+
+# Table styles are read-only once built, so every report shares them
+_REPORT_TABLE_STYLE = TableStyle([
+    ('FONTNAME', (0, 0), (-1, -1), 'Helvetica'),
+    ('FONTSIZE', (0, 0), (-1, -1), 10),
+    ('FONTNAME', (0, 0), (0, -1), 'Helvetica-Bold'),
+    ('ALIGN', (0, 0), (-1, -1), 'LEFT'),
+    ('VALIGN', (0, 0), (-1, -1), 'TOP'),
+    ('GRID', (0, 0), (-1, -1), 1, colors.lightgrey),
+    ('BACKGROUND', (0, 0), (0, -1), colors.lightblue),
+    ('ROWBACKGROUNDS', (0, 0), (-1, -1), [colors.white, colors.lightyellow])
+])
+
+_METADATA_TABLE_STYLE = TableStyle([
+    ('FONTNAME', (0, 0), (-1, -1), 'Helvetica'),
+    ('FONTSIZE', (0, 0), (-1, -1), 9),
+    ('FONTNAME', (0, 0), (0, -1), 'Helvetica-Bold'),
+    ('ALIGN', (0, 0), (-1, -1), 'LEFT'),
+    ('GRID', (0, 0), (-1, -1), 1, colors.lightgrey),
+])
+
+# Emoji and markdown bold markers stripped from recommendations, in one pass
+_EMOJI_RE = re.compile(r"🚨|⚠️|📞|✅|\*\*")
+
+# Interactions per run before forcing a page break in the detailed analysis
+_INTERACTION_CHUNK_SIZE = 500
+
+# Per-interaction detail block; {timing} is "" or a "<br/>..." row, and the evidence/type
+# rows are appended once per report when the interactions carry those fields
+_DETAIL_TMPL = (
+    "<b>Severity Level:</b> {sev}"
+    "<br/><b>Mechanism of Interaction:</b> {mech}"
+    "<br/><b>Clinical Effect:</b> {eff}{timing}"
+)
+_EVIDENCE_ROW = "<br/><b>Evidence Level:</b> {evidence}"
+_TYPE_ROW = "<br/><b>Interaction Type:</b> {itype}"
+
+def _bucket(interactions) -> tuple:
+    """Split interactions into (avoid, caution, safe) lists in one pass"""
+    # Severity.rank is 0/1/2 for avoid/caution/safe, so it indexes the tuple directly
+    buckets = ([], [], [])
+    for interaction in interactions:
+        buckets[interaction.severity.rank].append(interaction)
+    return buckets
+
+def _severity_counts(results) -> tuple:
+    """(avoid, caution, safe) counts, from the engine's precomputed fields when present"""
+    if getattr(results, 'avoid_count', None) is not None:
+        return results.avoid_count, results.caution_count, results.safe_count
+    avoid, caution, safe = _bucket(results.interactions)
+    return len(avoid), len(caution), len(safe)
+
+def _bullet_markup(items, names: Optional[Dict[str, str]] = None) -> str:
+    """<br/>-joined bullet lines (items are escaped for Paragraph markup, via ``names`` when given)"""
+    if names is not None:
+        return "<br/>".join(f"• {names[item]}" for item in items)
+    return "<br/>".join(f"• {escape(str(item))}" for item in items)
+
+def _escape_names(results) -> Dict[str, str]:
+    """Escape every medication/food name used in the report once (names repeat across sections)"""
+    names = {}
+    for name in chain(results.medications_analyzed, results.foods_analyzed,
+                      chain.from_iterable((i.medication, i.food) for i in results.interactions)):
+        if name not in names:
+            names[name] = escape(name)
+    return names
+
+def _bullet_paragraph(items, style=_NORMAL, names: Optional[Dict[str, str]] = None) -> Paragraph:
+    """One Paragraph holding a whole bullet list"""
+    return Paragraph(_bullet_markup(items, names), style)
+
+# Static report text, shared by every report
+_GENERAL_GUIDELINES = (
+    "Always take medications as prescribed by your healthcare provider",
+    "Inform all healthcare providers about all medications, supplements, and dietary habits",
+    "Read medication labels and patient information leaflets carefully",
+    "Never stop or change medications without consulting your healthcare provider",
+    "Keep a current list of all medications and supplements you take",
+    "Be aware that herbal supplements can also interact with medications",
+    "Consider timing: some interactions can be avoided by spacing medication and food intake",
+    "Monitor for any unusual symptoms and report them to your healthcare provider",
+    "Regular medication reviews with your pharmacist or doctor are recommended"
+)
+_GENERAL_GUIDELINES_MARKUP = _bullet_markup(_GENERAL_GUIDELINES)
+
+_EMERGENCY_SIGNS = (
+    "Severe allergic reactions (difficulty breathing, swelling, rash)",
+    "Unusual bleeding or bruising",
+    "Severe nausea, vomiting, or abdominal pain",
+    "Dizziness, fainting, or rapid heartbeat",
+    "Any sudden, severe, or concerning symptoms after taking medication with food"
+)
+_EMERGENCY_SIGNS_MARKUP = _bullet_markup(_EMERGENCY_SIGNS)
+
+_LIMITATIONS = (
+    "Individual patient factors (genetics, kidney/liver function, age) may affect interactions",
+    "Dosage amounts and timing can influence interaction severity",
+    "Some interactions may be theoretical and not clinically proven",
+    "New interactions may be discovered as research continues",
+    "This analysis cannot account for all possible medication combinations",
+    "Herbal supplements and over-the-counter medications may not be fully covered"
+)
+_LIMITATIONS_MARKUP = _bullet_markup(_LIMITATIONS)
+
+# Key findings when nothing was found, as one paragraph instead of one per line
+_NO_FINDINGS = (
+    "No significant drug-food interactions were identified in this analysis",
+    "This suggests a generally safe profile for the analyzed combinations",
+    "Continue following standard medication instructions and dietary guidelines",
+)
+_NO_FINDINGS_MARKUP = _bullet_markup(_NO_FINDINGS)
+
+# (title, description) per severity, in rank order: avoid, caution, safe
+_SEVERITY_SECTIONS = (
+    ("CRITICAL INTERACTIONS - AVOID THESE COMBINATIONS", 
+     "These drug-food combinations should be completely avoided due to serious risk of adverse effects:"),
+    ("INTERACTIONS REQUIRING CAUTION", 
+     "These combinations require careful monitoring and may need timing adjustments:"),
+    ("LOW-RISK INTERACTIONS - INFORMATIONAL", 
+     "These combinations are generally safe but included for completeness:")
+)
+
+_DISCLAIMER = """
+        <b>MEDICAL DISCLAIMER:</b><br/>
+        This comprehensive analysis is for informational and educational purposes only. 
+        It should not replace professional medical advice, diagnosis, or treatment. 
+        Always consult qualified healthcare providers before making changes to medications or diet.
+        Individual responses to drug-food interactions may vary based on genetics, health conditions, 
+        dosage, timing, and other medications. This report is based on available scientific literature 
+        and may not account for all possible interactions or individual factors.
+        """
+
+_SUMMARY_DISCLAIMER = (
+    "This summary is for informational purposes only. Always consult healthcare providers "
+    "before making changes to medications or diet."
+)
+
+_METHODOLOGY_TEXT = """
+        This analysis uses a comprehensive database of documented drug-food interactions compiled from:
+        • FDA-approved drug labeling and prescribing information
+        • Peer-reviewed medical and pharmaceutical literature
+        • Clinical pharmacy references and databases
+        • Pharmacokinetic and pharmacodynamic studies
+        • Post-market surveillance reports
+        
+        The analysis engine evaluates interactions based on:
+        • Severity classification (Avoid, Caution, Safe)
+        • Clinical evidence quality and strength
+        • Documented mechanisms of action
+        • Frequency and significance of reported effects
+        
+        Confidence scores reflect the quality and consistency of available evidence, 
+        with higher scores indicating well-established interactions supported by multiple 
+        high-quality sources.
+        """
+
+# Comprehensive-report section order for each shape (has_interactions, has_analytics),
+# resolved at import so report generation walks a fixed list instead of branching
+_SECTION_PLANS = {
+    (has_interactions, has_analytics): (
+        ('title', 'summary')
+        + (('interactions', 'recommendations') if has_interactions else ())
+        + (('analytics',) if has_analytics else ())
+        + ('appendix',)
+    )
+    for has_interactions in (False, True)
+    for has_analytics in (False, True)
+}
+
+# Shared workers for building report sections (Paragraph parsing is per-instance, so thread-safe);
+# one worker per section of the longest plan so a report's sections all start together
+_SECTION_EXECUTOR = ThreadPoolExecutor(max_workers=max(map(len, _SECTION_PLANS.values())),
+                                       thread_name_prefix="pdf-sections")
+
+def _make_doc(buffer) -> BaseDocTemplate:
+    """Letter document with 1in margins and a single page template/frame.
+    
+    Same layout SimpleDocTemplate produced, without its First/Later template
+    switch on every page.
+    """
+    # Compress page streams regardless of the site's rl_config defaults
+    doc = BaseDocTemplate(buffer, pagesize=letter, rightMargin=72, leftMargin=72, topMargin=72, bottomMargin=72,
+                          pageCompression=1)
+    frame = Frame(doc.leftMargin, doc.bottomMargin, doc.width, doc.height, id='normal')
+    doc.addPageTemplates([PageTemplate(id='Report', frames=[frame], pagesize=letter)])
+    return doc
 
 class PDFReportGenerator:
     def __init__(self):
-        self.styles = getSampleStyleSheet()
+        self.styles = _STYLES
     
-    def generate_comprehensive_report(self, results: AnalysisResults, analytics_data: Optional[Dict] = None) -> bytes:
-        """Generate a comprehensive PDF report with enhanced information"""
+    def generate_comprehensive_report(self, results: 'AnalysisResults', analytics_data: Optional[Dict] = None,
+                                      out: Optional[IO[bytes]] = None) -> Optional[bytes]:
+        """Generate a comprehensive PDF report with enhanced information.
         
-        buffer = io.BytesIO()
-        doc = SimpleDocTemplate(buffer, pagesize=letter, rightMargin=72, leftMargin=72, topMargin=72, bottomMargin=72)
-        
-        story = []
-        
-        # Enhanced title page
-        story.extend(self._create_enhanced_title_page(results))
-        story.append(PageBreak())
+        With ``out`` the PDF is written straight to that stream and None is returned;
+        otherwise the PDF bytes are returned.
+        """
         
-        # Executive summary with more detail
-        story.extend(self._create_detailed_executive_summary(results))
-        story.append(PageBreak())
+        buffer = io.BytesIO() if out is None else out
+        doc = _make_doc(buffer)
         
-        # Comprehensive interaction analysis
-        story.extend(self._create_comprehensive_interaction_analysis(results))
+        story = []
         
-        # Safety recommendations
-        if results.interactions:
-            story.append(PageBreak())
-            story.extend(self._create_safety_recommendations(results))
+        # Severity counts for the title page and summary (precomputed by the engine)
+        counts = _severity_counts(results)
+        
+        # Markup-safe medication/food names shared by the title page and interaction details
+        names = _escape_names(results)
+        
+        # Values shown in several sections, computed once
+        now = datetime.now()
+        conf_pct = int(results.confidence_score * 100)
+        
+        # Builder and arguments for every section; the plan for this report's shape
+        # says which ones appear, in page order
+        builders = {
+            # Enhanced title page
+            'title': (self._create_enhanced_title_page, results, counts, now, conf_pct, names),
+            # Executive summary with more detail (already states when nothing was found)
+            'summary': (self._create_detailed_executive_summary, results, counts, conf_pct),
+            # Comprehensive interaction analysis
+            'interactions': (self._create_comprehensive_interaction_analysis, results, None, names),
+            # Safety recommendations
+            'recommendations': (self._create_safety_recommendations, results),
+            # Analytics insights
+            'analytics': (self._create_analytics_insights, analytics_data),
+            # Enhanced appendix
+            'appendix': (self._create_enhanced_appendix, results, now, conf_pct),
+        }
+        plan = _SECTION_PLANS[bool(results.interactions), bool(analytics_data)]
         
-        # Analytics insights
-        if analytics_data:
-            story.append(PageBreak())
-            story.extend(self._create_analytics_insights(analytics_data))
+        # Sections only read results/analytics_data, so build them concurrently
+        # and stitch them together in page order below
+        sections = [_SECTION_EXECUTOR.submit(*builders[name]) for name in plan]
         
-        # Enhanced appendix
-        story.append(PageBreak())
-        story.extend(self._create_enhanced_appendix(results))
+        # One page break between consecutive sections
+        for idx, section in enumerate(sections):
+            if idx:
+                story.append(PageBreak())
+            story.extend(section.result())
         
         # Build the PDF
         doc.build(story)
-        buffer.seek(0)
+        
+        if out is not None:
+            return None
         return buffer.getvalue()
     
-    def _create_enhanced_title_page(self, results: AnalysisResults) -> List:
+    def _create_enhanced_title_page(self, results: 'AnalysisResults', counts: Optional[tuple] = None,
+                                    now: Optional[datetime] = None, conf_pct: Optional[int] = None,
+                                    names: Optional[Dict[str, str]] = None) -> List:
         """Create enhanced title page with more information"""
-        story = []
-        
-        # Main title with styling
-        story.append(Paragraph("COMPREHENSIVE DRUG-FOOD INTERACTION REPORT", self.styles['Title']))
-        story.append(Spacer(1, 20))
+        names = names or _escape_names(results)
+        now = now or datetime.now()
+        if conf_pct is None:
+            conf_pct = int(results.confidence_score * 100)
+        avoid_count, caution_count, _ = counts or _severity_counts(results)
         
         # Risk assessment box
         risk_level = results.overall_risk_level.value.upper()
         risk_color = self._get_risk_color(results.overall_risk_level)
         
-        story.append(Paragraph(f'<b>OVERALL RISK ASSESSMENT: <font color="{risk_color}">{risk_level}</font></b>', self.styles['Heading2']))
-        story.append(Spacer(1, 30))
-        
         # Enhanced report details
         report_data = [
-            ['Report Generated:', datetime.now().strftime('%B %d, %Y at %I:%M %p')],
-            ['Analysis Confidence:', f"{int(results.confidence_score * 100)}% (Based on scientific evidence)"],
+            ['Report Generated:', now.strftime('%B %d, %Y at %I:%M %p')],
+            ['Analysis Confidence:', f"{conf_pct}% (Based on scientific evidence)"],
             ['Total Interactions Found:', f"{len(results.interactions)} documented interactions"],
             ['Medications Analyzed:', f"{len(results.medications_analyzed)} medications"],
             ['Foods Analyzed:', f"{len(results.foods_analyzed)} food items"],
-            ['Critical Interactions:', str(sum(1 for i in results.interactions if i.severity == Severity.AVOID))],
-            ['Caution Interactions:', str(sum(1 for i in results.interactions if i.severity == Severity.CAUTION))],
+            ['Critical Interactions:', str(avoid_count)],
+            ['Caution Interactions:', str(caution_count)],
             ['Analysis Time:', results.analysis_timestamp],
         ]
         
         report_table = Table(report_data, colWidths=[2.5*inch, 3.5*inch])
-        report_table.setStyle(TableStyle([
-            ('FONTNAME', (0, 0), (-1, -1), 'Helvetica'),
-            ('FONTSIZE', (0, 0), (-1, -1), 10),
-            ('FONTNAME', (0, 0), (0, -1), 'Helvetica-Bold'),
-            ('ALIGN', (0, 0), (-1, -1), 'LEFT'),
-            ('VALIGN', (0, 0), (-1, -1), 'TOP'),
-            ('GRID', (0, 0), (-1, -1), 1, colors.lightgrey),
-            ('BACKGROUND', (0, 0), (0, -1), colors.lightblue),
-            ('ROWBACKGROUNDS', (0, 0), (-1, -1), [colors.white, colors.lightyellow])
-        ]))
-        
-        story.append(report_table)
-        story.append(Spacer(1, 40))
-        
-        # Enhanced medication and food lists
-        story.append(Paragraph("ANALYZED MEDICATIONS:", self.styles['Heading3']))
-        for med in results.medications_analyzed:
-            story.append(Paragraph(f"• {med}", self.styles['Normal']))
-        
-        story.append(Spacer(1, 20))
-        
-        story.append(Paragraph("ANALYZED FOODS:", self.styles['Heading3']))
-        for food in results.foods_analyzed:
-            story.append(Paragraph(f"• {food}", self.styles['Normal']))
-        
-        story.append(Spacer(1, 30))
-        
-        # Enhanced disclaimer
-        disclaimer = """
-        <b>MEDICAL DISCLAIMER:</b><br/>
-        This comprehensive analysis is for informational and educational purposes only. 
-        It should not replace professional medical advice, diagnosis, or treatment. 
-        Always consult qualified healthcare providers before making changes to medications or diet.
-        Individual responses to drug-food interactions may vary based on genetics, health conditions, 
-        dosage, timing, and other medications. This report is based on available scientific literature 
-        and may not account for all possible interactions or individual factors.
-        """
-        story.append(Paragraph(disclaimer, self.styles['Normal']))
-        
-        return story
+        report_table.setStyle(_REPORT_TABLE_STYLE)
+        
+        return [
+            # Main title with styling
+            Paragraph("COMPREHENSIVE DRUG-FOOD INTERACTION REPORT", _TITLE),
+            Spacer(1, 20),
+            Paragraph(f'<b>OVERALL RISK ASSESSMENT: <font color="{risk_color}">{risk_level}</font></b>', _H2),
+            Spacer(1, 30),
+            report_table,
+            Spacer(1, 40),
+            # Enhanced medication and food lists
+            Paragraph("ANALYZED MEDICATIONS:", _H3),
+            _bullet_paragraph(results.medications_analyzed, names=names),
+            Spacer(1, 20),
+            Paragraph("ANALYZED FOODS:", _H3),
+            _bullet_paragraph(results.foods_analyzed, names=names),
+            Spacer(1, 30),
+            # Enhanced disclaimer
+            Paragraph(_DISCLAIMER, _NORMAL),
+        ]
     
-    def _create_detailed_executive_summary(self, results: AnalysisResults) -> List:
+    def _create_detailed_executive_summary(self, results: 'AnalysisResults', counts: Optional[tuple] = None,
+                                           conf_pct: Optional[int] = None) -> List:
         """Create detailed executive summary"""
         story = []
+        if conf_pct is None:
+            conf_pct = int(results.confidence_score * 100)
         
-        story.append(Paragraph("EXECUTIVE SUMMARY", self.styles['Title']))
+        story.append(Paragraph("EXECUTIVE SUMMARY", _TITLE))
         story.append(Spacer(1, 20))
         
         # Enhanced analysis overview
-        story.append(Paragraph("ANALYSIS OVERVIEW", self.styles['Heading2']))
-        story.append(Paragraph(results.summary, self.styles['Normal']))
+        story.append(Paragraph("ANALYSIS OVERVIEW", _H2))
+        story.append(Paragraph(results.summary, _NORMAL))
         story.append(Spacer(1, 15))
         
         # Detailed findings
-        story.append(Paragraph("KEY FINDINGS", self.styles['Heading2']))
+        story.append(Paragraph("KEY FINDINGS", _H2))
         
         if results.interactions:
-            # Categorize interactions
-            avoid_interactions = [i for i in results.interactions if i.severity == Severity.AVOID]
-            caution_interactions = [i for i in results.interactions if i.severity == Severity.CAUTION]
-            safe_interactions = [i for i in results.interactions if i.severity == Severity.SAFE]
+            # Counts per severity
+            avoid_count, caution_count, safe_count = counts or _severity_counts(results)
             
             findings = [
                 f"• Total drug-food interactions identified: {len(results.interactions)}",
-                f"• Analysis confidence level: {int(results.confidence_score * 100)}%"
+                f"• Analysis confidence level: {conf_pct}%"
             ]
             
-            if avoid_interactions:
-                findings.append(f"• CRITICAL: {len(avoid_interactions)} interaction(s) requiring immediate attention and avoidance")
+            if avoid_count:
+                findings.append(f"• CRITICAL: {avoid_count} interaction(s) requiring immediate attention and avoidance")
                 findings.append("  - These combinations may cause serious adverse effects")
                 findings.append("  - Immediate consultation with healthcare provider recommended")
             
-            if caution_interactions:
-                findings.append(f"• CAUTION: {len(caution_interactions)} interaction(s) requiring monitoring")
+            if caution_count:
+                findings.append(f"• CAUTION: {caution_count} interaction(s) requiring monitoring")
                 findings.append("  - These combinations may reduce effectiveness or cause mild side effects")
                 findings.append("  - Timing adjustments or monitoring may be necessary")
             
-            if safe_interactions:
-                findings.append(f"• INFORMATIONAL: {len(safe_interactions)} low-risk interaction(s) noted")
+            if safe_count:
+                findings.append(f"• INFORMATIONAL: {safe_count} low-risk interaction(s) noted")
                 findings.append("  - These combinations are generally safe but worth awareness")
             
-            for finding in findings:
-                story.append(Paragraph(finding, self.styles['Normal']))
+            story.append(Paragraph("<br/>".join(findings), _NORMAL))
         else:
-            story.append(Paragraph("• No significant drug-food interactions were identified in this analysis", self.styles['Normal']))
-            story.append(Paragraph("• This suggests a generally safe profile for the analyzed combinations", self.styles['Normal']))
-            story.append(Paragraph("• Continue following standard medication instructions and dietary guidelines", self.styles['Normal']))
+            story.append(Paragraph(_NO_FINDINGS_MARKUP, _NORMAL))
         
         story.append(Spacer(1, 20))
         
         # AI Analysis summary (if available)
         if hasattr(results, 'ai_analysis') and results.ai_analysis:
-            story.append(Paragraph("ENHANCED AI ANALYSIS", self.styles['Heading2']))
-            story.append(Paragraph(results.ai_analysis.enhanced_summary, self.styles['Normal']))
+            story.append(Paragraph("ENHANCED AI ANALYSIS", _H2))
+            story.append(Paragraph(results.ai_analysis.enhanced_summary, _NORMAL))
             story.append(Spacer(1, 10))
-            story.append(Paragraph(f"Analysis Method: {results.ai_analysis.analysis_method}", self.styles['Normal']))
-            story.append(Paragraph(f"Processing Confidence: {int(results.ai_analysis.confidence * 100)}%", self.styles['Normal']))
+            story.append(Paragraph(f"Analysis Method: {results.ai_analysis.analysis_method}", _NORMAL))
+            story.append(Paragraph(f"Processing Confidence: {int(results.ai_analysis.confidence * 100)}%", _NORMAL))
         
         return story
     
-    def _create_comprehensive_interaction_analysis(self, results: AnalysisResults) -> List:
+    def _create_comprehensive_interaction_analysis(self, results: 'AnalysisResults', buckets: Optional[tuple] = None,
+                                                   names: Optional[Dict[str, str]] = None) -> List:
         """Create comprehensive interaction analysis with detailed tables"""
         story = []
         
-        story.append(Paragraph("DETAILED INTERACTION ANALYSIS", self.styles['Title']))
+        story.append(Paragraph("DETAILED INTERACTION ANALYSIS", _TITLE))
         story.append(Spacer(1, 20))
         
         if not results.interactions:
@@ -191,117 +388,76 @@ class PDFReportGenerator:
                 "No significant drug-food interactions were identified. This indicates a generally safe "
                 "profile for your analyzed medications and foods. However, always continue to follow "
                 "medication instructions and consult healthcare providers for any concerns.",
-                self.styles['Normal']
+                _NORMAL
             ))
             return story
         
-        # Group interactions by severity
-        interactions_by_severity = {
-            Severity.AVOID: [],
-            Severity.CAUTION: [],
-            Severity.SAFE: []
-        }
+        names = names or _escape_names(results)
         
-        for interaction in results.interactions:
-            interactions_by_severity[interaction.severity].append(interaction)
+        # Group interactions by severity (indexed by Severity.rank)
+        interactions_by_severity = buckets or _bucket(results.interactions)
         
         # Display each severity group with enhanced details
-        severity_info = {
-            Severity.AVOID: ("CRITICAL INTERACTIONS - AVOID THESE COMBINATIONS", 
-                           "These drug-food combinations should be completely avoided due to serious risk of adverse effects:"),
-            Severity.CAUTION: ("INTERACTIONS REQUIRING CAUTION", 
-                             "These combinations require careful monitoring and may need timing adjustments:"),
-            Severity.SAFE: ("LOW-RISK INTERACTIONS - INFORMATIONAL", 
-                          "These combinations are generally safe but included for completeness:")
-        }
         
-        for severity in [Severity.AVOID, Severity.CAUTION, Severity.SAFE]:
-            interactions = interactions_by_severity[severity]
+        # All interactions share one type, so probe the optional fields once and
+        # bake the rows they always produce into this report's detail template
+        sample = results.interactions[0]
+        has_evidence = hasattr(sample, 'evidence_level')
+        has_type = hasattr(sample, 'interaction_type')
+        detail_tmpl = _DETAIL_TMPL + (_EVIDENCE_ROW if has_evidence else "") + (_TYPE_ROW if has_type else "")
+        
+        for (title, description), interactions in zip(_SEVERITY_SECTIONS, interactions_by_severity):
             if not interactions:
                 continue
             
-            title, description = severity_info[severity]
-            
-            story.append(Paragraph(title, self.styles['Heading2']))
-            story.append(Paragraph(description, self.styles['Normal']))
+            story.append(Paragraph(title, _H2))
+            story.append(Paragraph(description, _NORMAL))
             story.append(Spacer(1, 10))
             
             # Enhanced interaction details for each item
             for idx, interaction in enumerate(interactions, 1):
-                story.append(Paragraph(f"{idx}. {interaction.medication} + {interaction.food}", self.styles['Heading3']))
-                
-                # Detailed interaction information
-                details = [
-                    f"<b>Severity Level:</b> {interaction.severity.value.upper()}",
-                    f"<b>Mechanism of Interaction:</b> {interaction.mechanism}",
-                    f"<b>Clinical Effect:</b> {interaction.clinical_effect}",
-                ]
-                
-                if interaction.timing_recommendation:
-                    details.append(f"<b>Timing Guidance:</b> {interaction.timing_recommendation}")
+                # Very long groups are split into pages of _INTERACTION_CHUNK_SIZE entries
+                if idx > 1 and (idx - 1) % _INTERACTION_CHUNK_SIZE == 0:
+                    story.append(PageBreak())
                 
-                if hasattr(interaction, 'evidence_level'):
-                    details.append(f"<b>Evidence Level:</b> {interaction.evidence_level}")
+                story.append(Paragraph(f"{idx}. {names[interaction.medication]} + {names[interaction.food]}", _H3))
                 
-                if hasattr(interaction, 'interaction_type'):
-                    details.append(f"<b>Interaction Type:</b> {interaction.interaction_type}")
-                
-                for detail in details:
-                    story.append(Paragraph(detail, self.styles['Normal']))
+                # Detailed interaction information (timing only when present)
+                timing = interaction.timing_recommendation
+                story.append(Paragraph(detail_tmpl.format(
+                    sev=interaction.severity.value.upper(),
+                    mech=escape(str(interaction.mechanism)),
+                    eff=escape(str(interaction.clinical_effect)),
+                    timing=f"<br/><b>Timing Guidance:</b> {escape(timing)}" if timing else "",
+                    evidence=escape(str(interaction.evidence_level)) if has_evidence else "",
+                    itype=escape(str(interaction.interaction_type)) if has_type else ""
+                ), _NORMAL))
                 
                 story.append(Spacer(1, 10))
         
         return story
     
-    def _create_safety_recommendations(self, results: AnalysisResults) -> List:
+    def _create_safety_recommendations(self, results: 'AnalysisResults') -> List:
         """Create enhanced safety recommendations section"""
-        story = []
-        
-        story.append(Paragraph("SAFETY RECOMMENDATIONS & CLINICAL GUIDANCE", self.styles['Title']))
-        story.append(Spacer(1, 20))
+        story = [Paragraph("SAFETY RECOMMENDATIONS & CLINICAL GUIDANCE", _TITLE), Spacer(1, 20)]
         
         if results.recommendations:
-            story.append(Paragraph("SPECIFIC RECOMMENDATIONS FOR YOUR ANALYSIS:", self.styles['Heading2']))
-            
-            for i, rec in enumerate(results.recommendations, 1):
-                clean_rec = rec.replace("🚨", "").replace("⚠️", "").replace("📞", "").replace("✅", "").replace("**", "").strip()
-                story.append(Paragraph(f"{i}. {clean_rec}", self.styles['Normal']))
-            
+            story.append(Paragraph("SPECIFIC RECOMMENDATIONS FOR YOUR ANALYSIS:", _H2))
+            story.extend(
+                Paragraph(f"{i}. {escape(_EMOJI_RE.sub('', rec).strip())}", _NORMAL)
+                for i, rec in enumerate(results.recommendations, 1)
+            )
             story.append(Spacer(1, 20))
         
-        # General safety guidelines
-        story.append(Paragraph("GENERAL SAFETY GUIDELINES:", self.styles['Heading2']))
-        
-        general_guidelines = [
-            "Always take medications as prescribed by your healthcare provider",
-            "Inform all healthcare providers about all medications, supplements, and dietary habits",
-            "Read medication labels and patient information leaflets carefully",
-            "Never stop or change medications without consulting your healthcare provider",
-            "Keep a current list of all medications and supplements you take",
-            "Be aware that herbal supplements can also interact with medications",
-            "Consider timing: some interactions can be avoided by spacing medication and food intake",
-            "Monitor for any unusual symptoms and report them to your healthcare provider",
-            "Regular medication reviews with your pharmacist or doctor are recommended"
-        ]
-        
-        for guideline in general_guidelines:
-            story.append(Paragraph(f"• {guideline}", self.styles['Normal']))
-        
-        story.append(Spacer(1, 20))
-        
-        # Emergency information
-        story.append(Paragraph("WHEN TO SEEK IMMEDIATE MEDICAL ATTENTION:", self.styles['Heading3']))
-        
-        emergency_signs = [
-            "Severe allergic reactions (difficulty breathing, swelling, rash)",
-            "Unusual bleeding or bruising",
-            "Severe nausea, vomiting, or abdominal pain",
-            "Dizziness, fainting, or rapid heartbeat",
-            "Any sudden, severe, or concerning symptoms after taking medication with food"
-        ]
-        
-        for sign in emergency_signs:
-            story.append(Paragraph(f"• {sign}", self.styles['Normal']))
+        story.extend((
+            # General safety guidelines
+            Paragraph("GENERAL SAFETY GUIDELINES:", _H2),
+            Paragraph(_GENERAL_GUIDELINES_MARKUP, _NORMAL),
+            Spacer(1, 20),
+            # Emergency information
+            Paragraph("WHEN TO SEEK IMMEDIATE MEDICAL ATTENTION:", _H3),
+            Paragraph(_EMERGENCY_SIGNS_MARKUP, _NORMAL),
+        ))
         
         return story
     
@@ -309,13 +465,13 @@ class PDFReportGenerator:
         """Create analytics insights section"""
         story = []
         
-        story.append(Paragraph("ANALYTICS INSIGHTS", self.styles['Title']))
+        story.append(Paragraph("ANALYTICS INSIGHTS", _TITLE))
         story.append(Spacer(1, 20))
         
         # Database overview
         overview = analytics_data.get('overview_stats', {})
         if overview:
-            story.append(Paragraph("DATABASE COVERAGE ANALYSIS:", self.styles['Heading2']))
+            story.append(Paragraph("DATABASE COVERAGE ANALYSIS:", _H2))
             
             insights = [
                 f"Total medications in database: {overview.get('total_medications', 0):,}",
@@ -326,15 +482,14 @@ class PDFReportGenerator:
                 f"Interaction coverage rate: {overview.get('interaction_coverage_rate', 0):.1f}%"
             ]
             
-            for insight in insights:
-                story.append(Paragraph(f"• {insight}", self.styles['Normal']))
+            story.append(_bullet_paragraph(insights))
             
             story.append(Spacer(1, 15))
         
         # Data quality information
         quality_data = analytics_data.get('data_quality_metrics', {})
         if quality_data:
-            story.append(Paragraph("DATA QUALITY ASSESSMENT:", self.styles['Heading2']))
+            story.append(Paragraph("DATA QUALITY ASSESSMENT:", _H2))
             
             quality_info = [
                 f"Overall data quality score: {quality_data.get('data_quality_score', 0):.1f}%",
@@ -343,141 +498,98 @@ class PDFReportGenerator:
                 f"Interaction data completeness: {quality_data.get('interaction_completeness', 0):.1f}%"
             ]
             
-            for info in quality_info:
-                story.append(Paragraph(f"• {info}", self.styles['Normal']))
+            story.append(_bullet_paragraph(quality_info))
         
         return story
     
-    def _create_enhanced_appendix(self, results: AnalysisResults) -> List:
+    def _create_enhanced_appendix(self, results: 'AnalysisResults', now: Optional[datetime] = None,
+                                  conf_pct: Optional[int] = None) -> List:
         """Create enhanced appendix with technical details"""
-        story = []
-        
-        story.append(Paragraph("TECHNICAL APPENDIX", self.styles['Title']))
-        story.append(Spacer(1, 20))
-        
-        # Methodology
-        story.append(Paragraph("ANALYSIS METHODOLOGY:", self.styles['Heading2']))
-        
-        methodology_text = """
-        This analysis uses a comprehensive database of documented drug-food interactions compiled from:
-        • FDA-approved drug labeling and prescribing information
-        • Peer-reviewed medical and pharmaceutical literature
-        • Clinical pharmacy references and databases
-        • Pharmacokinetic and pharmacodynamic studies
-        • Post-market surveillance reports
-        
-        The analysis engine evaluates interactions based on:
-        • Severity classification (Avoid, Caution, Safe)
-        • Clinical evidence quality and strength
-        • Documented mechanisms of action
-        • Frequency and significance of reported effects
-        
-        Confidence scores reflect the quality and consistency of available evidence, 
-        with higher scores indicating well-established interactions supported by multiple 
-        high-quality sources.
-        """
-        
-        story.append(Paragraph(methodology_text, self.styles['Normal']))
-        story.append(Spacer(1, 15))
-        
-        # Limitations
-        story.append(Paragraph("ANALYSIS LIMITATIONS:", self.styles['Heading2']))
-        
-        limitations = [
-            "Individual patient factors (genetics, kidney/liver function, age) may affect interactions",
-            "Dosage amounts and timing can influence interaction severity",
-            "Some interactions may be theoretical and not clinically proven",
-            "New interactions may be discovered as research continues",
-            "This analysis cannot account for all possible medication combinations",
-            "Herbal supplements and over-the-counter medications may not be fully covered"
-        ]
-        
-        for limitation in limitations:
-            story.append(Paragraph(f"• {limitation}", self.styles['Normal']))
-        
-        story.append(Spacer(1, 20))
+        now = now or datetime.now()
+        if conf_pct is None:
+            conf_pct = int(results.confidence_score * 100)
         
         # Report metadata
-        story.append(Paragraph("REPORT METADATA:", self.styles['Heading2']))
-        
         metadata_data = [
-            ['Report Generation Date:', datetime.now().strftime('%Y-%m-%d %H:%M:%S UTC')],
+            ['Report Generation Date:', now.strftime('%Y-%m-%d %H:%M:%S UTC')],
             ['Analysis Engine Version:', 'DietRx Enhanced v2.0'],
             ['Database Last Updated:', 'Current'],
-            ['Analysis Confidence Score:', f"{int(results.confidence_score * 100)}%"],
+            ['Analysis Confidence Score:', f"{conf_pct}%"],
             ['Total Processing Time:', f"{getattr(results, 'processing_time', 'N/A')} seconds"],
         ]
         
         metadata_table = Table(metadata_data, colWidths=[2.5*inch, 3.5*inch])
-        metadata_table.setStyle(TableStyle([
-            ('FONTNAME', (0, 0), (-1, -1), 'Helvetica'),
-            ('FONTSIZE', (0, 0), (-1, -1), 9),
-            ('FONTNAME', (0, 0), (0, -1), 'Helvetica-Bold'),
-            ('ALIGN', (0, 0), (-1, -1), 'LEFT'),
-            ('GRID', (0, 0), (-1, -1), 1, colors.lightgrey),
-        ]))
-        
-        story.append(metadata_table)
-        
-        return story
+        metadata_table.setStyle(_METADATA_TABLE_STYLE)
+        
+        return [
+            Paragraph("TECHNICAL APPENDIX", _TITLE),
+            Spacer(1, 20),
+            # Methodology
+            Paragraph("ANALYSIS METHODOLOGY:", _H2),
+            Paragraph(_METHODOLOGY_TEXT, _NORMAL),
+            Spacer(1, 15),
+            # Limitations
+            Paragraph("ANALYSIS LIMITATIONS:", _H2),
+            Paragraph(_LIMITATIONS_MARKUP, _NORMAL),
+            Spacer(1, 20),
+            Paragraph("REPORT METADATA:", _H2),
+            metadata_table,
+        ]
     
     def _get_risk_color(self, severity):
         """Get color for risk level"""
-        if severity == Severity.AVOID:
+        if severity.value == "avoid":
             return "red"
-        elif severity == Severity.CAUTION:
+        elif severity.value == "caution":
             return "orange"
         else:
             return "green"
     
-    def generate_summary_report(self, results: AnalysisResults) -> bytes:
-        """Generate enhanced summary report"""
-        buffer = io.BytesIO()
-        doc = SimpleDocTemplate(buffer, pagesize=letter, rightMargin=72, leftMargin=72, topMargin=72, bottomMargin=72)
-        
-        story = []
-        
-        # Enhanced title
-        story.append(Paragraph("Drug-Food Interaction Analysis Summary", self.styles['Title']))
-        story.append(Spacer(1, 20))
-        
-        # Key information
-        story.append(Paragraph(f"Generated: {datetime.now().strftime('%B %d, %Y at %I:%M %p')}", self.styles['Normal']))
-        story.append(Paragraph(f"Overall Risk Level: {results.overall_risk_level.value.upper()}", self.styles['Heading2']))
-        story.append(Paragraph(f"Analysis Confidence: {int(results.confidence_score * 100)}%", self.styles['Normal']))
-        story.append(Spacer(1, 15))
-        
-        # Enhanced summary
-        story.append(Paragraph("SUMMARY:", self.styles['Heading3']))
-        story.append(Paragraph(results.summary, self.styles['Normal']))
-        story.append(Spacer(1, 15))
+    def generate_summary_report(self, results: 'AnalysisResults',
+                                out: Optional[IO[bytes]] = None) -> Optional[bytes]:
+        """Generate enhanced summary report (written to ``out`` if given, else returned as bytes)"""
+        buffer = io.BytesIO() if out is None else out
+        doc = _make_doc(buffer)
+        
+        story = [
+            # Enhanced title
+            Paragraph("Drug-Food Interaction Analysis Summary", _TITLE),
+            Spacer(1, 20),
+            # Key information
+            Paragraph(f"Generated: {datetime.now().strftime('%B %d, %Y at %I:%M %p')}", _NORMAL),
+            Paragraph(f"Overall Risk Level: {results.overall_risk_level.value.upper()}", _H2),
+            Paragraph(f"Analysis Confidence: {int(results.confidence_score * 100)}%", _NORMAL),
+            Spacer(1, 15),
+            # Enhanced summary
+            Paragraph("SUMMARY:", _H3),
+            Paragraph(results.summary, _NORMAL),
+            Spacer(1, 15),
+        ]
         
         # Key interactions with more detail
         if results.interactions:
-            story.append(Paragraph("KEY INTERACTIONS:", self.styles['Heading3']))
+            story.append(Paragraph("KEY INTERACTIONS:", _H3))
+            lines = []
             for interaction in results.interactions[:5]:  # Top 5
-                story.append(Paragraph(
-                    f"• {interaction.medication} + {interaction.food} ({interaction.severity.value.upper()})",
-                    self.styles['Normal']
-                ))
-                story.append(Paragraph(f"  Effect: {interaction.clinical_effect}", self.styles['Normal']))
+                lines.append(
+                    f"• {escape(interaction.medication)} + {escape(interaction.food)} ({interaction.severity.value.upper()})"
+                )
+                lines.append(f"  Effect: {escape(str(interaction.clinical_effect))}")
+            story.append(Paragraph("<br/>".join(lines), _NORMAL))
             story.append(Spacer(1, 15))
         
         # Enhanced recommendations
         if results.recommendations:
-            story.append(Paragraph("KEY RECOMMENDATIONS:", self.styles['Heading3']))
-            for rec in results.recommendations[:3]:  # Top 3
-                clean_rec = rec.replace("🚨", "").replace("⚠️", "").replace("📞", "").replace("✅", "").replace("**", "").strip()
-                story.append(Paragraph(f"• {clean_rec}", self.styles['Normal']))
+            story.append(Paragraph("KEY RECOMMENDATIONS:", _H3))
+            story.append(_bullet_paragraph(
+                _EMOJI_RE.sub("", rec).strip() for rec in results.recommendations[:3]  # Top 3
+            ))
         
         # Disclaimer
-        story.append(Spacer(1, 20))
-        story.append(Paragraph("DISCLAIMER:", self.styles['Heading3']))
-        story.append(Paragraph(
-            "This summary is for informational purposes only. Always consult healthcare providers before making changes to medications or diet.",
-            self.styles['Normal']
-        ))
+        story.extend((Spacer(1, 20), Paragraph("DISCLAIMER:", _H3), Paragraph(_SUMMARY_DISCLAIMER, _NORMAL)))
         
         doc.build(story)
-        buffer.seek(0)
+        
+        if out is not None:
+            return None
         return buffer.getvalue()
\ No newline at end of file